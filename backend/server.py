@@ -1,41 +1,179 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+import redis.asyncio as aioredis
 import os
+import asyncio
+import functools
+import hashlib
+import time
 import logging
+import orjson
 from pathlib import Path
-from pydantic import BaseModel, Field
+from urllib.parse import urlencode
+from contextlib import asynccontextmanager
+from pydantic import BaseModel, Field, TypeAdapter
 from typing import List, Optional
 import uuid
+import re
 from datetime import datetime, timezone
 from emergentintegrations.llm.chat import LlmChat, UserMessage
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
+class MongoClientPool:
+    """One AsyncIOMotorClient per event loop; clients of closed loops are dropped."""
+
+    def __init__(self, url, **options):
+        self.url = url
+        self.options = options
+        self._clients = {}
+
+    def get(self) -> AsyncIOMotorClient:
+        loop = asyncio.get_running_loop()
+        for stale in [other for other in self._clients if other.is_closed()]:
+            self._clients.pop(stale).close()
+        client = self._clients.get(loop)
+        if client is None:
+            client = AsyncIOMotorClient(self.url, io_loop=loop, **self.options)
+            self._clients[loop] = client
+        return client
+
+    def close(self):
+        for client in self._clients.values():
+            client.close()
+        self._clients.clear()
+
+class LoopBoundDatabase:
+    """Forwards `db.<collection>` to the database of the current loop's client."""
+
+    def __init__(self, pool: MongoClientPool, name: str):
+        self.pool = pool
+        self.name = name
+
+    def __getattr__(self, attr):
+        return getattr(self.pool.get()[self.name], attr)
+
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# minPoolSize keeps warm connections open so the first requests skip the handshake;
+# tz_aware returns stored dates as UTC datetimes instead of naive ones
+mongo_pool = MongoClientPool(mongo_url, maxPoolSize=50, minPoolSize=10, tz_aware=True)
+db = LoopBoundDatabase(mongo_pool, os.environ['DB_NAME'])
+
+# Redis response cache, enabled only when REDIS_URL is set
+REDIS_URL = os.environ.get('REDIS_URL')
+CACHE_TTL = 3600  # seconds an entry is served as fresh
+CACHE_STALE_TTL = 300  # extra seconds a stale entry is served while it refreshes
+redis_client = None
+_refreshing_keys = set()
+_refresh_tasks = set()  # strong references so background refreshes aren't collected mid-flight
+
+# AI explanations depend only on their inputs, so they are kept much longer
+EXPLANATION_CACHE_TTL = 30 * 24 * 3600
+_explanation_tasks = {}
+
+# Browser/CDN caching for read-only endpoints: clients may store responses but
+# must revalidate with If-None-Match on every use, so writes show up immediately
+HTTP_CACHE_PATHS = ("/api/poets", "/api/poems", "/api/search")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global redis_client
+    # Open connections, build indexes and migrate data before serving, so the
+    # first request does not pay for handshakes or cold index pages
+    await db.command("ping")
+    await create_indexes()
+    await backfill_search_fields()
+    await migrate_string_dates()
+    await warm_indexes()
+    if REDIS_URL:
+        redis_client = aioredis.from_url(REDIS_URL)
+        try:
+            await redis_client.ping()
+        except Exception as e:
+            logger.warning(f"Redis is unreachable, serving uncached until it returns: {e}")
+    yield
+    mongo_pool.close()
+    if redis_client is not None:
+        await redis_client.aclose()
 
 # Create the main app without a prefix
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
+# Queries shorter than this fall back to a regex scan: the $text index
+# only matches whole words, which is useless for one or two letters.
+TEXT_SEARCH_MIN_LENGTH = 3
+SNIPPET_LENGTH = 120  # characters of poem content returned around a search hit
+
+# Page sizes for list endpoints
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Fields mirrored into a normalized `<field>_norm` copy, which the $text
+# index covers; the prefix fields also get a B-tree index for short queries
+POET_SEARCH_FIELDS = ("name", "bio")
+POEM_SEARCH_FIELDS = ("title", "content", "poet_name")
+POET_PREFIX_FIELDS = ("name",)
+POEM_PREFIX_FIELDS = ("title", "poet_name")
+
+ARABIC_DIACRITICS = re.compile(r"[\u064B-\u0652\u0640]")  # تشكيل وتطويل
+ARABIC_LETTER_FORMS = str.maketrans({"أ": "ا", "إ": "ا", "آ": "ا", "ى": "ي", "ة": "ه"})
+
 # AI Chat instance
+LLM_TIMEOUT = 20  # seconds before an explanation request is abandoned
+LLM_SEM = asyncio.Semaphore(int(os.environ.get('LLM_CONCURRENCY', 10)))
+# Shared per-minute token budget across workers (tracked in Redis); 0 disables it
+LLM_TOKENS_PER_MINUTE = int(os.environ.get('LLM_TOKENS_PER_MINUTE', 0))
+LLM_OUTPUT_TOKEN_ESTIMATE = 300  # ~150 Arabic words
+MAX_EXPLAIN_BATCH = 50  # words per /explain-words request
+EXPLANATION_SYSTEM_MESSAGE = "أنت خبير في الشعر العربي واللغة العربية. مهمتك شرح معاني الكلمات العربية والتراكيب الشعرية بطريقة واضحة ومفصلة. اشرح المعنى اللغوي والسياق الشعري والبلاغة إن وجدت."
+
 def get_ai_chat():
+    # LlmChat keeps the conversation history on the instance, so sharing one
+    # would leak every user's prompts into the next request. It is a thin
+    # wrapper; the HTTP client underneath is pooled by the library.
     return LlmChat(
         api_key=os.environ.get('EMERGENT_LLM_KEY'),
         session_id="poetry_explanation",
-        system_message="أنت خبير في الشعر العربي واللغة العربية. مهمتك شرح معاني الكلمات العربية والتراكيب الشعرية بطريقة واضحة ومفصلة. اشرح المعنى اللغوي والسياق الشعري والبلاغة إن وجدت."
+        system_message=EXPLANATION_SYSTEM_MESSAGE
     ).with_model("openai", "gpt-4o-mini")
 
+def is_rate_limit_error(exc):
+    # The provider's RateLimitError class depends on the backend LlmChat routes to
+    return type(exc).__name__ == "RateLimitError" or getattr(exc, "status_code", None) == 429
+
+@retry(
+    wait=wait_exponential(multiplier=1, max=30),
+    stop=stop_after_attempt(3),
+    retry=retry_if_exception(is_rate_limit_error),
+    reraise=True
+)
+async def send_to_llm(chat, message):
+    async with LLM_SEM:
+        return await asyncio.wait_for(chat.send_message(message), timeout=LLM_TIMEOUT)
+
+def uuid7() -> str:
+    """Time-ordered UUID (RFC 9562 v7): new ids land at the end of the `id` index."""
+    unix_ms = time.time_ns() // 1_000_000
+    rand = int.from_bytes(os.urandom(10), "big")
+    value = (unix_ms & (2**48 - 1)) << 80
+    value |= 0x7 << 76 | (rand >> 62 & 0xFFF) << 64
+    value |= 0b10 << 62 | rand & (2**62 - 1)
+    return str(uuid.UUID(int=value))
+
 # Define Models
 class Poet(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=uuid7)
     name: str
     bio: str
     era: str  # جاهلي، أموي، عباسي، أندلسي، حديث
@@ -44,7 +182,7 @@ class Poet(BaseModel):
     image_url: Optional[str] = None
 
 class Poem(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=uuid7)
     title: str
     poet_id: str
     poet_name: str
@@ -53,11 +191,31 @@ class Poem(BaseModel):
     meter: Optional[str] = None  # البحر الشعري
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+class PoemSummary(BaseModel):
+    # ما تحتاجه بطاقة نتيجة البحث فقط، بدلاً من نص القصيدة كاملاً
+    id: str
+    title: str
+    poet_name: str
+    theme: str
+    snippet: str
+
+# Validate whole result lists in one pass instead of one model call per row
+_POET_LIST = TypeAdapter(List[Poet])
+_POEM_LIST = TypeAdapter(List[Poem])
+_POEM_SUMMARY_LIST = TypeAdapter(List[PoemSummary])
+
 class WordExplanation(BaseModel):
     word: str
     context: str  # الجملة أو البيت الذي جاءت فيه الكلمة
     explanation: str
 
+class BatchWordExplanation(BaseModel):
+    # نتيجة كلمة واحدة في طلب الدفعة: إما شرح أو رسالة خطأ
+    word: str
+    context: str
+    explanation: Optional[str] = None
+    error: Optional[str] = None
+
 class WordExplanationRequest(BaseModel):
     word: str
     context: str
@@ -65,29 +223,83 @@ class WordExplanationRequest(BaseModel):
     poet_name: Optional[str] = None
 
 class User(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=uuid7)
     username: str
     email: str
     favorites: List[str] = []  # poem IDs
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 # Helper functions
-def prepare_for_mongo(data):
-    if isinstance(data, dict):
-        for key, value in data.items():
-            if isinstance(value, datetime):
-                data[key] = value.isoformat()
+def normalize_arabic(text: str) -> str:
+    # حذف التشكيل وتوحيد أشكال الهمزة والألف المقصورة والتاء المربوطة
+    return ARABIC_DIACRITICS.sub("", text).translate(ARABIC_LETTER_FORMS).lower()
+
+def add_search_fields(data, fields):
+    for field in fields:
+        if isinstance(data.get(field), str):
+            data[f"{field}_norm"] = normalize_arabic(data[field])
     return data
 
-def parse_from_mongo(item):
-    if isinstance(item, dict):
-        for key, value in item.items():
-            if key.endswith('_at') and isinstance(value, str):
-                try:
-                    item[key] = datetime.fromisoformat(value)
-                except:
-                    pass
-    return item
+async def _store_in_cache(key, func, kwargs):
+    try:
+        result = await func(**kwargs)
+        entry = {"stored_at": time.time(), "data": jsonable_encoder(result)}
+        try:
+            await redis_client.set(key, orjson.dumps(entry), ex=CACHE_TTL + CACHE_STALE_TTL)
+        except Exception as e:
+            logger.warning(f"Cache write failed for {key}: {e}")
+        return result
+    finally:
+        _refreshing_keys.discard(key)
+
+async def _refresh_in_background(key, func, kwargs):
+    try:
+        await _store_in_cache(key, func, kwargs)
+    except Exception as e:
+        logger.warning(f"Cache refresh failed for {key}: {e}")
+
+def cached(namespace):
+    """Cache a GET handler's response in Redis, keyed on its arguments.
+
+    Entries older than CACHE_TTL are still returned while a background task
+    refreshes them (stale-while-revalidate), so only cold keys hit MongoDB.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(**kwargs):
+            if redis_client is None:
+                return await func(**kwargs)
+
+            args = urlencode(sorted((k, v) for k, v in kwargs.items() if v is not None))
+            key = f"{namespace}:{func.__name__}?{args}"
+            try:
+                raw = await redis_client.get(key)
+            except Exception as e:
+                logger.warning(f"Cache read failed for {key}: {e}")
+                return await func(**kwargs)
+
+            if raw is None:
+                return await _store_in_cache(key, func, kwargs)
+
+            entry = orjson.loads(raw)
+            if time.time() - entry["stored_at"] > CACHE_TTL and key not in _refreshing_keys:
+                _refreshing_keys.add(key)
+                task = asyncio.create_task(_refresh_in_background(key, func, kwargs))
+                _refresh_tasks.add(task)
+                task.add_done_callback(_refresh_tasks.discard)
+            return entry["data"]
+        return wrapper
+    return decorator
+
+async def invalidate_cache(*namespaces):
+    if redis_client is None:
+        return
+    try:
+        for namespace in namespaces:
+            async for key in redis_client.scan_iter(match=f"{namespace}:*"):
+                await redis_client.delete(key)
+    except Exception as e:
+        logger.warning(f"Cache invalidation failed for {namespaces}: {e}")
 
 # Routes
 @api_router.get("/")
@@ -96,11 +308,13 @@ async def root():
 
 # Poets routes
 @api_router.get("/poets", response_model=List[Poet])
-async def get_poets():
-    poets = await db.poets.find().to_list(1000)
-    return [Poet(**poet) for poet in poets]
+@cached("poets")
+async def get_poets(skip: int = Query(0, ge=0), limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)):
+    cursor = db.poets.find().sort("_id", 1).skip(skip).limit(limit)
+    return _POET_LIST.validate_python(await cursor.to_list(limit))
 
 @api_router.get("/poets/{poet_id}", response_model=Poet)
+@cached("poets")
 async def get_poet(poet_id: str):
     poet = await db.poets.find_one({"id": poet_id})
     if not poet:
@@ -109,95 +323,241 @@ async def get_poet(poet_id: str):
 
 @api_router.post("/poets", response_model=Poet)
 async def create_poet(poet: Poet):
-    poet_dict = prepare_for_mongo(poet.dict())
+    poet_dict = add_search_fields(poet.dict(), POET_SEARCH_FIELDS)
     await db.poets.insert_one(poet_dict)
+    await invalidate_cache("poets", "search")
     return poet
 
 # Poems routes
 @api_router.get("/poems", response_model=List[Poem])
-async def get_poems(poet_id: Optional[str] = None, theme: Optional[str] = None):
-    query = {}
+@cached("poems")
+async def get_poems(
+    poet_id: Optional[str] = None,
+    theme: Optional[str] = None,
+    before: Optional[datetime] = None,
+    before_id: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+):
+    # created_at غير التاريخي (نص تعذّر تحويله) يُرتَّب بعد كل التواريخ ولا يطابق $lt أبداً، فيُستبعد من الترقيم
+    query = {"created_at": {"$type": "date"}}
     if poet_id:
         query["poet_id"] = poet_id
     if theme:
         query["theme"] = theme
+    # ترقيم بالمفتاح: الصفحة التالية تبدأ بعد (created_at, id) لآخر قصيدة في الصفحة السابقة؛
+    # id يفصل بين القصائد التي تتشارك created_at (تواريخ BSON بدقة الميلي ثانية)
+    if before and before_id:
+        query["$or"] = [
+            {"created_at": {"$lt": before}},
+            {"created_at": before, "id": {"$lt": before_id}}
+        ]
+    elif before:
+        query["created_at"]["$lt"] = before
     
-    poems = await db.poems.find(query).to_list(1000)
-    return [Poem(**parse_from_mongo(poem)) for poem in poems]
+    cursor = db.poems.find(query).sort([("created_at", -1), ("id", -1)]).limit(limit)
+    return _POEM_LIST.validate_python(await cursor.to_list(limit))
 
 @api_router.get("/poems/{poem_id}", response_model=Poem)
+@cached("poems")
 async def get_poem(poem_id: str):
     poem = await db.poems.find_one({"id": poem_id})
     if not poem:
         raise HTTPException(status_code=404, detail="القصيدة غير موجودة")
-    return Poem(**parse_from_mongo(poem))
+    return Poem(**poem)
 
 @api_router.post("/poems", response_model=Poem)
 async def create_poem(poem: Poem):
-    poem_dict = prepare_for_mongo(poem.dict())
+    poem_dict = add_search_fields(poem.dict(), POEM_SEARCH_FIELDS)
     await db.poems.insert_one(poem_dict)
+    await invalidate_cache("poems", "search")
     return poem
 
 # AI Word Explanation
+def explanation_cache_key(request: WordExplanationRequest) -> str:
+    raw = "|".join([request.word, request.context, request.poem_title or "", request.poet_name or ""])
+    return "explain:" + hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+async def reserve_llm_tokens(estimate: int):
+    """Count an estimated token spend against this minute's budget, or reject with 429."""
+    if redis_client is None or not LLM_TOKENS_PER_MINUTE:
+        return
+    key = f"llm:tokens:{int(time.time() // 60)}"
+    try:
+        async with redis_client.pipeline() as pipe:
+            used, _ = await pipe.incrby(key, estimate).expire(key, 120).execute()
+    except Exception as e:
+        logger.warning(f"Token budget check failed: {e}")
+        return
+    if used > LLM_TOKENS_PER_MINUTE:
+        raise HTTPException(status_code=429, detail="تم تجاوز حد الطلبات، يرجى المحاولة بعد قليل")
+
+async def generate_explanation(request: WordExplanationRequest) -> str:
+    # تحضير السياق للذكاء الاصطناعي
+    context_info = f"الكلمة: {request.word}\n"
+    context_info += f"السياق: {request.context}\n"
+    if request.poem_title:
+        context_info += f"القصيدة: {request.poem_title}\n"
+    if request.poet_name:
+        context_info += f"الشاعر: {request.poet_name}\n"
+    
+    prompt = f"""
+    {context_info}
+    
+    يرجى شرح معنى الكلمة المحددة في سياقها الشعري. اذكر:
+    1. المعنى اللغوي للكلمة
+    2. المعنى في السياق الشعري
+    3. أي إشارات بلاغية أو أدبية إن وجدت
+    
+    اجعل الشرح مختصر وواضح (لا يتجاوز 150 كلمة).
+    """
+    
+    await reserve_llm_tokens(len(prompt) // 2 + LLM_OUTPUT_TOKEN_ESTIMATE)
+    chat = get_ai_chat()
+    user_message = UserMessage(text=prompt)
+    return await send_to_llm(chat, user_message)
+
+async def _generate_and_cache_explanation(key: str, request: WordExplanationRequest) -> str:
+    explanation = await generate_explanation(request)
+    if redis_client is not None:
+        try:
+            await redis_client.set(key, orjson.dumps({"explanation": explanation}), ex=EXPLANATION_CACHE_TTL)
+        except Exception as e:
+            logger.warning(f"Cache write failed for {key}: {e}")
+    return explanation
+
+async def get_explanation(request: WordExplanationRequest) -> str:
+    """Return a cached explanation, or generate it once for all concurrent callers."""
+    key = explanation_cache_key(request)
+    if redis_client is not None:
+        try:
+            raw = await redis_client.get(key)
+            if raw is not None:
+                return orjson.loads(raw)["explanation"]
+        except Exception as e:
+            logger.warning(f"Cache read failed for {key}: {e}")
+
+    # طلبات متزامنة للكلمة نفسها تنتظر استدعاءً واحداً للنموذج
+    task = _explanation_tasks.get(key)
+    if task is None:
+        task = asyncio.create_task(_generate_and_cache_explanation(key, request))
+        _explanation_tasks[key] = task
+        task.add_done_callback(lambda _: _explanation_tasks.pop(key, None))
+    return await asyncio.shield(task)
+
+def explanation_error(e: Exception) -> HTTPException:
+    if isinstance(e, HTTPException):
+        return e
+    if is_rate_limit_error(e):
+        return HTTPException(status_code=429, detail="تم تجاوز حد الطلبات، يرجى المحاولة بعد قليل")
+    if isinstance(e, asyncio.TimeoutError):
+        return HTTPException(status_code=504, detail="انتهت مهلة خدمة الشرح، يرجى المحاولة مرة أخرى")
+    return HTTPException(status_code=500, detail=f"خطأ في شرح الكلمة: {str(e)}")
+
 @api_router.post("/explain-word", response_model=WordExplanation)
 async def explain_word(request: WordExplanationRequest):
     try:
-        # تحضير السياق للذكاء الاصطناعي
-        context_info = f"الكلمة: {request.word}\n"
-        context_info += f"السياق: {request.context}\n"
-        if request.poem_title:
-            context_info += f"القصيدة: {request.poem_title}\n"
-        if request.poet_name:
-            context_info += f"الشاعر: {request.poet_name}\n"
-        
-        prompt = f"""
-        {context_info}
-        
-        يرجى شرح معنى الكلمة المحددة في سياقها الشعري. اذكر:
-        1. المعنى اللغوي للكلمة
-        2. المعنى في السياق الشعري
-        3. أي إشارات بلاغية أو أدبية إن وجدت
-        
-        اجعل الشرح مختصر وواضح (لا يتجاوز 150 كلمة).
-        """
-        
-        chat = get_ai_chat()
-        user_message = UserMessage(text=prompt)
-        response = await chat.send_message(user_message)
+        explanation = await get_explanation(request)
         
         return WordExplanation(
             word=request.word,
             context=request.context,
-            explanation=response
+            explanation=explanation
         )
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"خطأ في شرح الكلمة: {str(e)}")
+        raise explanation_error(e)
+
+@api_router.post("/explain-words", response_model=List[BatchWordExplanation])
+async def explain_words(batch: List[WordExplanationRequest]):
+    # شرح كلمات متعددة في طلب واحد؛ تُرسل إلى النموذج بالتوازي ضمن حد LLM_SEM
+    if len(batch) > MAX_EXPLAIN_BATCH:
+        raise HTTPException(status_code=400, detail=f"الحد الأقصى {MAX_EXPLAIN_BATCH} كلمة في الطلب الواحد")
+    # فشل كلمة واحدة لا يُسقط شروح بقية الكلمات؛ يُعاد خطؤها في حقل error
+    results = await asyncio.gather(
+        *[get_explanation(request) for request in batch],
+        return_exceptions=True
+    )
+    if batch and all(isinstance(result, Exception) for result in results):
+        raise explanation_error(results[0])
+    return [
+        BatchWordExplanation(word=request.word, context=request.context, error=explanation_error(result).detail)
+        if isinstance(result, Exception)
+        else BatchWordExplanation(word=request.word, context=request.context, explanation=result)
+        for request, result in zip(batch, results)
+    ]
 
 # Search
+def poem_summary_projection(q: str):
+    """Search result card with a content snippet around the query's first word."""
+    words = q.split()
+    first_word = words[0] if words else ""
+    return {
+        "_id": 0,
+        "id": 1,
+        "title": 1,
+        "poet_name": 1,
+        "theme": 1,
+        "snippet": {"$let": {
+            "vars": {
+                "typed_hit": {"$indexOfCP": ["$content", {"$literal": first_word}]},
+                "norm_hit": {"$indexOfCP": ["$content", {"$literal": normalize_arabic(first_word)}]}
+            },
+            "in": {"$substrCP": [
+                "$content",
+                {"$max": [
+                    0,
+                    {"$subtract": [
+                        {"$cond": [{"$gte": ["$$typed_hit", 0]}, "$$typed_hit", "$$norm_hit"]},
+                        SNIPPET_LENGTH // 2
+                    ]}
+                ]},
+                SNIPPET_LENGTH
+            ]}
+        }}
+    }
+
 @api_router.get("/search")
+@cached("search")
 async def search(q: str):
     # البحث في الشعراء والقصائد
-    poets = await db.poets.find({"name": {"$regex": q, "$options": "i"}}).to_list(10)
-    poems = await db.poems.find({
-        "$or": [
-            {"title": {"$regex": q, "$options": "i"}},
-            {"content": {"$regex": q, "$options": "i"}},
-            {"poet_name": {"$regex": q, "$options": "i"}}
+    q_norm = normalize_arabic(q.strip())
+    if len(q_norm) < TEXT_SEARCH_MIN_LENGTH:
+        # تعبير مثبّت بلا خيار "i" ليتحول إلى مسح نطاق على الفهرس
+        pattern = {"$regex": f"^{re.escape(q_norm)}"}
+        poets_task = db.poets.find({"name_norm": pattern}).to_list(10)
+        poem_stages = [
+            {"$match": {"$or": [{"title_norm": pattern}, {"poet_name_norm": pattern}]}}
         ]
-    }).to_list(20)
+    else:
+        text_query = {"$text": {"$search": q_norm}}
+        score = {"score": {"$meta": "textScore"}}
+        poets_task = db.poets.find(text_query, score).sort([("score", {"$meta": "textScore"})]).to_list(10)
+        poem_stages = [
+            {"$match": text_query},
+            {"$sort": score}
+        ]
+    poems_task = db.poems.aggregate(poem_stages + [
+        {"$limit": 20},
+        {"$project": poem_summary_projection(q.strip())}
+    ]).to_list(20)
+    # الاستعلامان مستقلان فيُنفذان بالتوازي
+    poets, poems = await asyncio.gather(poets_task, poems_task)
     
     return {
-        "poets": [Poet(**poet) for poet in poets],
-        "poems": [Poem(**parse_from_mongo(poem)) for poem in poems]
+        "poets": _POET_LIST.validate_python(poets),
+        "poems": _POEM_SUMMARY_LIST.validate_python(poems)
     }
 
 # Initialize sample data
 @api_router.post("/init-data")
 async def init_sample_data():
+    # الواجهة تستدعي هذا المسار عند كل تحميل للصفحة الرئيسية؛ لا نكرر البيانات ولا نمسح الذاكرة المؤقتة
+    if await db.poets.estimated_document_count():
+        return {"message": "البيانات التجريبية موجودة بالفعل"}
+
     # إضافة شعراء عينة
     sample_poets = [
         {
-            "id": str(uuid.uuid4()),
+            "id": uuid7(),
             "name": "أبو الطيب المتنبي",
             "bio": "أحد أعظم شعراء العربية، عُرف بفصاحته وحكمته وعزة نفسه. وُلد في الكوفة وعاش في القرن الرابع الهجري.",
             "era": "عباسي",
@@ -206,7 +566,7 @@ async def init_sample_data():
             "image_url": "https://images.unsplash.com/photo-1507003211169-0a1dd7228f2d?w=300&h=300&fit=crop&crop=face"
         },
         {
-            "id": str(uuid.uuid4()),
+            "id": uuid7(),
             "name": "امرؤ القيس",
             "bio": "شاعر جاهلي، يُعتبر من أصحاب المعلقات السبع. عُرف بشعر الغزل والوصف والحماسة.",
             "era": "جاهلي",
@@ -219,7 +579,7 @@ async def init_sample_data():
     # إضافة قصائد عينة
     sample_poems = [
         {
-            "id": str(uuid.uuid4()),
+            "id": uuid7(),
             "title": "على قدر أهل العزم",
             "poet_id": sample_poets[0]["id"],
             "poet_name": "أبو الطيب المتنبي",
@@ -228,10 +588,11 @@ async def init_sample_data():
 وتعظم في عين الصغير صغارها
 وتصغر في عين العظيم العظائم""",
             "theme": "حكمة",
-            "meter": "الطويل"
+            "meter": "الطويل",
+            "created_at": datetime.now(timezone.utc)
         },
         {
-            "id": str(uuid.uuid4()),
+            "id": uuid7(),
             "title": "قفا نبك من ذكرى حبيب ومنزل",
             "poet_id": sample_poets[1]["id"],
             "poet_name": "امرؤ القيس",
@@ -240,19 +601,48 @@ async def init_sample_data():
 فتوضح فالمقراة لم يعف رسمها
 لما نسجتها من جنوب وشمأل""",
             "theme": "غزل",
-            "meter": "الطويل"
+            "meter": "الطويل",
+            "created_at": datetime.now(timezone.utc)
         }
     ]
     
     # حفظ البيانات
-    await db.poets.insert_many(sample_poets)
-    await db.poems.insert_many(sample_poems)
+    for poet in sample_poets:
+        add_search_fields(poet, POET_SEARCH_FIELDS)
+    for poem in sample_poems:
+        add_search_fields(poem, POEM_SEARCH_FIELDS)
+    await asyncio.gather(
+        db.poets.insert_many(sample_poets, ordered=False),
+        db.poems.insert_many(sample_poems, ordered=False)
+    )
+    await invalidate_cache("poets", "poems", "search")
     
     return {"message": "تم إنشاء البيانات التجريبية بنجاح"}
 
 # Include the router in the main app
 app.include_router(api_router)
 
+@app.middleware("http")
+async def add_etag(request: Request, call_next):
+    response = await call_next(request)
+    if (
+        request.method != "GET"
+        or response.status_code != 200
+        or not request.url.path.startswith(HTTP_CACHE_PATHS)
+    ):
+        return response
+
+    # The ETag is a hash of the body, so a write changes it and the next revalidation gets a 200
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    etag = f'W/"{hashlib.sha1(body).hexdigest()}"'
+    cache_headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=cache_headers)
+
+    response = Response(content=body, status_code=response.status_code, headers=dict(response.headers))
+    response.headers.update(cache_headers)
+    return response
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -268,6 +658,65 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+async def create_indexes():
+    # get_poet/get_poem look documents up by our own `id`, not `_id`
+    await db.poets.create_index("id", unique=True)
+    await db.poems.create_index("id", unique=True)
+    # get_poems filters by poet_id, theme, both or neither, always newest-first,
+    # so each filter shape gets an index that also yields the (created_at, id) order
+    await db.poems.create_index([("poet_id", 1), ("theme", 1), ("created_at", -1), ("id", -1)])
+    await db.poems.create_index([("poet_id", 1), ("created_at", -1), ("id", -1)])
+    await db.poems.create_index([("theme", 1), ("created_at", -1), ("id", -1)])
+    await db.poems.create_index([("created_at", -1), ("id", -1)])
+    # MongoDB has no Arabic stemmer, so index the normalized tokens as they are
+    await db.poems.create_index(
+        [(f"{field}_norm", "text") for field in POEM_SEARCH_FIELDS],
+        default_language="none"
+    )
+    await db.poets.create_index(
+        [(f"{field}_norm", "text") for field in POET_SEARCH_FIELDS],
+        default_language="none"
+    )
+    for field in POEM_PREFIX_FIELDS:
+        await db.poems.create_index(f"{field}_norm")
+    for field in POET_PREFIX_FIELDS:
+        await db.poets.create_index(f"{field}_norm")
+
+async def backfill_search_fields():
+    # Documents written before the `_norm` copies existed
+    for collection, fields in ((db.poets, POET_SEARCH_FIELDS), (db.poems, POEM_SEARCH_FIELDS)):
+        updates = []
+        cursor = collection.find({f"{fields[0]}_norm": {"$exists": False}}, {field: 1 for field in fields})
+        async for doc in cursor:
+            norm_fields = {
+                f"{field}_norm": normalize_arabic(doc[field])
+                for field in fields if isinstance(doc.get(field), str)
+            }
+            updates.append(UpdateOne({"_id": doc["_id"]}, {"$set": norm_fields}))
+        if updates:
+            await collection.bulk_write(updates, ordered=False)
+
+async def migrate_string_dates():
+    # created_at used to be stored as an ISO string, or not at all; make it a BSON date.
+    # Unparseable strings are left as they are rather than failing startup.
+    await db.poems.update_many(
+        {"created_at": {"$type": "string"}},
+        [{"$set": {"created_at": {"$convert": {
+            "input": "$created_at",
+            "to": "date",
+            "onError": "$created_at"
+        }}}}]
+    )
+    # Poems from before created_at was stored get the insert time from their ObjectId
+    await db.poems.update_many(
+        {"created_at": {"$exists": False}},
+        [{"$set": {"created_at": {"$toDate": "$_id"}}}]
+    )
+
+async def warm_indexes():
+    # One cheap query per hot index so its pages are cached before the first request
+    await asyncio.gather(
+        db.poets.find_one({"id": ""}),
+        db.poems.find_one({"id": ""}),
+        db.poems.find_one({}, sort=[("created_at", -1), ("id", -1)])
+    )
@@ -1,9 +1,14 @@
 #!/usr/bin/env python3
-import requests
+import argparse
+import asyncio
+import httpx
+import logging
+import orjson
 import sys
-import json
 from datetime import datetime
 
+logger = logging.getLogger("backend_test")
+
 class ArabicPoetryAPITester:
     def __init__(self, base_url="https://poetryverse.preview.emergentagent.com"):
         self.base_url = base_url
@@ -12,59 +17,53 @@ class ArabicPoetryAPITester:
         self.tests_passed = 0
         self.sample_poet_id = None
         self.sample_poem_id = None
+        self.client = None
 
-    def run_test(self, name, method, endpoint, expected_status, data=None, params=None):
+    async def run_test(self, name, method, endpoint, expected_status, data=None, params=None):
         """Run a single API test"""
         url = f"{self.api_url}/{endpoint}" if not endpoint.startswith('http') else endpoint
-        headers = {'Content-Type': 'application/json'}
 
         self.tests_run += 1
-        print(f"\n🔍 Testing {name}...")
-        print(f"   URL: {url}")
         
         try:
-            if method == 'GET':
-                response = requests.get(url, headers=headers, params=params, timeout=30)
-            elif method == 'POST':
-                response = requests.post(url, json=data, headers=headers, timeout=30)
-            elif method == 'PUT':
-                response = requests.put(url, json=data, headers=headers, timeout=30)
-            elif method == 'DELETE':
-                response = requests.delete(url, headers=headers, timeout=30)
+            response = await self.client.request(method, url, json=data, params=params)
+        except Exception as e:
+            logger.info(f"\n🔍 Testing {name}...")
+            logger.info(f"   URL: {url}")
+            logger.warning(f"❌ Failed - Error: {str(e)}")
+            return False, {}
 
-            success = response.status_code == expected_status
-            if success:
-                self.tests_passed += 1
-                print(f"✅ Passed - Status: {response.status_code}")
-                try:
-                    response_data = response.json()
-                    if isinstance(response_data, list) and len(response_data) > 0:
-                        print(f"   Response: Found {len(response_data)} items")
-                    elif isinstance(response_data, dict):
-                        print(f"   Response keys: {list(response_data.keys())}")
-                    return True, response_data
-                except:
-                    return True, response.text
-            else:
-                print(f"❌ Failed - Expected {expected_status}, got {response.status_code}")
-                try:
-                    error_data = response.json()
-                    print(f"   Error: {error_data}")
-                except:
-                    print(f"   Error: {response.text}")
-                return False, {}
+        # Tests run concurrently, so each one logs its whole block once it has a response
+        logger.info(f"\n🔍 Testing {name}...")
+        logger.info(f"   URL: {url}")
+        try:
+            response_data = orjson.loads(response.content)
+        except orjson.JSONDecodeError:
+            response_data = None
 
-        except Exception as e:
-            print(f"❌ Failed - Error: {str(e)}")
+        success = response.status_code == expected_status
+        if success:
+            self.tests_passed += 1
+            logger.info(f"✅ Passed - Status: {response.status_code}")
+            if response_data is None:
+                return True, response.text
+            if isinstance(response_data, list) and len(response_data) > 0:
+                logger.info(f"   Response: Found {len(response_data)} items")
+            elif isinstance(response_data, dict):
+                logger.info(f"   Response keys: {list(response_data.keys())}")
+            return True, response_data
+        else:
+            logger.warning(f"❌ Failed - Expected {expected_status}, got {response.status_code}")
+            logger.warning(f"   Error: {response_data if response_data is not None else response.text}")
             return False, {}
 
-    def test_root_endpoint(self):
+    async def test_root_endpoint(self):
         """Test root API endpoint"""
-        return self.run_test("Root API Endpoint", "GET", "", 200)
+        return await self.run_test("Root API Endpoint", "GET", "", 200)
 
-    def test_init_sample_data(self):
+    async def test_init_sample_data(self):
         """Initialize sample data"""
-        success, response = self.run_test(
+        success, response = await self.run_test(
             "Initialize Sample Data",
             "POST", 
             "init-data",
@@ -72,9 +71,9 @@ class ArabicPoetryAPITester:
         )
         return success
 
-    def test_get_poets(self):
+    async def test_get_poets(self):
         """Test getting all poets"""
-        success, response = self.run_test(
+        success, response = await self.run_test(
             "Get All Poets",
             "GET",
             "poets",
@@ -82,25 +81,25 @@ class ArabicPoetryAPITester:
         )
         if success and isinstance(response, list) and len(response) > 0:
             self.sample_poet_id = response[0].get('id')
-            print(f"   Found sample poet: {response[0].get('name')} (ID: {self.sample_poet_id})")
+            logger.info(f"   Found sample poet: {response[0].get('name')} (ID: {self.sample_poet_id})")
         return success
 
-    def test_get_single_poet(self):
+    async def test_get_single_poet(self):
         """Test getting a single poet"""
         if not self.sample_poet_id:
-            print("❌ Skipped - No sample poet ID available")
+            logger.warning("❌ Skipped - No sample poet ID available")
             return False
             
-        return self.run_test(
+        return (await self.run_test(
             "Get Single Poet",
             "GET",
             f"poets/{self.sample_poet_id}",
             200
-        )[0]
+        ))[0]
 
-    def test_get_poems(self):
+    async def test_get_poems(self):
         """Test getting all poems"""
-        success, response = self.run_test(
+        success, response = await self.run_test(
             "Get All Poems",
             "GET",
             "poems",
@@ -108,23 +107,60 @@ class ArabicPoetryAPITester:
         )
         if success and isinstance(response, list) and len(response) > 0:
             self.sample_poem_id = response[0].get('id')
-            print(f"   Found sample poem: {response[0].get('title')} (ID: {self.sample_poem_id})")
+            logger.info(f"   Found sample poem: {response[0].get('title')} (ID: {self.sample_poem_id})")
         return success
 
-    def test_get_single_poem(self):
+    async def test_poems_paging(self):
+        """Test keyset paging with before/before_id"""
+        success, first_page = await self.run_test(
+            "Get Poems - First Page",
+            "GET",
+            "poems",
+            200,
+            params={"limit": 2}
+        )
+        if not success or len(first_page) < 2:
+            return success
+
+        last = first_page[-1]
+        success, next_page = await self.run_test(
+            "Get Poems - Next Page",
+            "GET",
+            "poems",
+            200,
+            params={"limit": 2, "before": last['created_at'], "before_id": last['id']}
+        )
+        if not success:
+            return False
+
+        # The next page must start strictly after the last item of the first one
+        self.tests_run += 1
+        cursor = (datetime.fromisoformat(last['created_at']), last['id'])
+        out_of_order = [
+            poem['id'] for poem in next_page
+            if (datetime.fromisoformat(poem['created_at']), poem['id']) >= cursor
+        ]
+        if out_of_order:
+            logger.warning(f"❌ Failed - Next page repeats or precedes the cursor: {out_of_order}")
+            return False
+        self.tests_passed += 1
+        logger.info("✅ Passed - Next page follows the cursor")
+        return True
+
+    async def test_get_single_poem(self):
         """Test getting a single poem"""
         if not self.sample_poem_id:
-            print("❌ Skipped - No sample poem ID available")
+            logger.warning("❌ Skipped - No sample poem ID available")
             return False
             
-        return self.run_test(
+        return (await self.run_test(
             "Get Single Poem",
             "GET",
             f"poems/{self.sample_poem_id}",
             200
-        )[0]
+        ))[0]
 
-    def test_search_functionality(self):
+    async def test_search_functionality(self):
         """Test search functionality"""
         test_cases = [
             ("المتنبي", "Search for poet name"),
@@ -132,9 +168,8 @@ class ArabicPoetryAPITester:
             ("حكمة", "Search for theme")
         ]
         
-        all_passed = True
-        for query, description in test_cases:
-            success, response = self.run_test(
+        async def search(query, description):
+            success, response = await self.run_test(
                 f"Search - {description}",
                 "GET",
                 "search",
@@ -144,14 +179,15 @@ class ArabicPoetryAPITester:
             if success:
                 poets_count = len(response.get('poets', []))
                 poems_count = len(response.get('poems', []))
-                print(f"   Found {poets_count} poets, {poems_count} poems")
-            all_passed = all_passed and success
+                logger.info(f"   Found {poets_count} poets, {poems_count} poems")
+            return success
             
-        return all_passed
+        results = await asyncio.gather(*[search(query, description) for query, description in test_cases])
+        return all(results)
 
-    def test_word_explanation(self):
+    async def test_word_explanation(self):
         """Test the main AI word explanation feature"""
-        print("\n🎯 Testing MAIN FEATURE: AI Word Explanation")
+        logger.info("\n🎯 Testing MAIN FEATURE: AI Word Explanation")
         
         test_cases = [
             {
@@ -174,10 +210,8 @@ class ArabicPoetryAPITester:
             }
         ]
         
-        all_passed = True
-        for i, test_case in enumerate(test_cases, 1):
-            print(f"\n   Test Case {i}: Explaining word '{test_case['word']}'")
-            success, response = self.run_test(
+        async def explain(test_case):
+            success, response = await self.run_test(
                 f"AI Word Explanation - {test_case['word']}",
                 "POST",
                 "explain-word",
@@ -188,57 +222,103 @@ class ArabicPoetryAPITester:
             if success and isinstance(response, dict):
                 explanation = response.get('explanation', '')
                 if explanation and len(explanation) > 10:
-                    print(f"   ✅ AI Explanation received: {explanation[:100]}...")
+                    logger.info(f"   ✅ AI Explanation received: {explanation[:100]}...")
                 else:
-                    print(f"   ❌ Empty or invalid explanation: {explanation}")
+                    logger.warning(f"   ❌ Empty or invalid explanation: {explanation}")
                     success = False
+            return success
             
-            all_passed = all_passed and success
-            
-        return all_passed
+        results = await asyncio.gather(*[explain(test_case) for test_case in test_cases])
+        return all(results)
+
+    async def test_batch_word_explanation(self):
+        """Test explaining several words in one /explain-words request"""
+        batch = [
+            {
+                "word": "الكرام",
+                "context": "وتأتي على قدر الكرام المكارم",
+                "poem_title": "على قدر أهل العزم",
+                "poet_name": "أبو الطيب المتنبي"
+            },
+            {
+                "word": "الصغير",
+                "context": "وتعظم في عين الصغير صغارها",
+                "poem_title": "على قدر أهل العزم",
+                "poet_name": "أبو الطيب المتنبي"
+            }
+        ]
+        success, response = await self.run_test(
+            "AI Batch Word Explanation",
+            "POST",
+            "explain-words",
+            200,
+            data=batch
+        )
+        
+        if success:
+            if not isinstance(response, list) or len(response) != len(batch):
+                logger.warning(f"   ❌ Expected {len(batch)} results, got: {response}")
+                return False
+            for item in response:
+                explanation = item.get('explanation') or ''
+                if len(explanation) > 10:
+                    logger.info(f"   ✅ '{item.get('word')}': {explanation[:100]}...")
+                else:
+                    logger.warning(f"   ❌ '{item.get('word')}' not explained: {item.get('error')}")
+                    success = False
+        return success
 
-    def test_poems_by_poet(self):
+    async def test_poems_by_poet(self):
         """Test getting poems by specific poet"""
         if not self.sample_poet_id:
-            print("❌ Skipped - No sample poet ID available")
+            logger.warning("❌ Skipped - No sample poet ID available")
             return False
             
-        return self.run_test(
+        return (await self.run_test(
             "Get Poems by Poet",
             "GET",
             "poems",
             200,
             params={"poet_id": self.sample_poet_id}
-        )[0]
+        ))[0]
+
+    async def test_poet_endpoints(self):
+        """Poet listing, then the tests that need a poet ID from it"""
+        await self.test_get_poets()
+        await asyncio.gather(self.test_get_single_poet(), self.test_poems_by_poet())
 
-    def run_all_tests(self):
+    async def test_poem_endpoints(self):
+        """Poem listing, then the single-poem and paging tests"""
+        await self.test_get_poems()
+        await asyncio.gather(self.test_get_single_poem(), self.test_poems_paging())
+
+    async def run_all_tests(self):
         """Run all API tests"""
-        print("🚀 Starting Arabic Poetry Platform API Tests")
-        print("=" * 60)
-        
-        # Test basic connectivity
-        print("\n📡 CONNECTIVITY TESTS")
-        self.test_root_endpoint()
-        
-        # Initialize data
-        print("\n🔧 DATA INITIALIZATION")
-        self.test_init_sample_data()
+        logger.info("🚀 Starting Arabic Poetry Platform API Tests")
+        logger.info("=" * 60)
         
-        # Test core endpoints
-        print("\n📚 CORE API TESTS")
-        self.test_get_poets()
-        self.test_get_single_poet()
-        self.test_get_poems()
-        self.test_get_single_poem()
-        self.test_poems_by_poet()
-        
-        # Test search functionality
-        print("\n🔍 SEARCH FUNCTIONALITY")
-        self.test_search_functionality()
-        
-        # Test main AI feature
-        print("\n🤖 AI INTEGRATION TESTS")
-        self.test_word_explanation()
+        async with httpx.AsyncClient(
+            headers={'Content-Type': 'application/json'},
+            limits=httpx.Limits(max_connections=8, max_keepalive_connections=8),
+            timeout=30
+        ) as self.client:
+            # Test basic connectivity
+            logger.info("\n📡 CONNECTIVITY TESTS")
+            await self.test_root_endpoint()
+            
+            # Initialize data
+            logger.info("\n🔧 DATA INITIALIZATION")
+            await self.test_init_sample_data()
+            
+            # Core endpoints, search and the main AI feature are independent
+            logger.info("\n📚 CORE API, 🔍 SEARCH & 🤖 AI INTEGRATION TESTS")
+            await asyncio.gather(
+                self.test_poet_endpoints(),
+                self.test_poem_endpoints(),
+                self.test_search_functionality(),
+                self.test_word_explanation(),
+                self.test_batch_word_explanation()
+            )
         
         # Print final results
         print("\n" + "=" * 60)
@@ -253,8 +333,14 @@ class ArabicPoetryAPITester:
             return 1
 
 def main():
+    parser = argparse.ArgumentParser(description="Arabic Poetry Platform API tests")
+    parser.add_argument("-q", "--quiet", action="store_true", help="only print the final results")
+    args = parser.parse_args()
+    logging.basicConfig(format="%(message)s", stream=sys.stdout)
+    logger.setLevel(logging.ERROR if args.quiet else logging.INFO)
+
     tester = ArabicPoetryAPITester()
-    return tester.run_all_tests()
+    return asyncio.run(tester.run_all_tests())
 
 if __name__ == "__main__":
     sys.exit(main())
\ No newline at end of file
@@ -53,8 +53,8 @@ const HomePage = () => {
   const loadData = async () => {
     try {
       const [poetsRes, poemsRes] = await Promise.all([
-        axios.get(`${API}/poets`),
-        axios.get(`${API}/poems`)
+        axios.get(`${API}/poets`, { params: { limit: 6 } }),
+        axios.get(`${API}/poems`, { params: { limit: 8 } })
       ]);
       setPoets(poetsRes.data.slice(0, 6));
       setPoems(poemsRes.data.slice(0, 8));
@@ -280,7 +280,7 @@ const PoemCard = ({ poem }) => (
       <CardContent>
         <div className="text-right">
           <p className="text-gray-700 dark:text-gray-200 leading-relaxed font-amiri text-lg mb-4">
-            {poem.content.split('\n')[0]}...
+            {poem.snippet ?? poem.content.split('\n')[0]}...
           </p>
           <Button variant="ghost" size="sm" className="text-amber-600 dark:text-amber-400 hover:bg-amber-50 dark:hover:bg-amber-900">
             <Sparkles className="h-4 w-4 ml-2" />
@@ -296,6 +296,18 @@ const PoemCard = ({ poem }) => (
 const PoemDialog = ({ poem, children }) => {
   const [explanation, setExplanation] = useState(null);
   const [loadingWord, setLoadingWord] = useState(null);
+  // Search results carry only a snippet; the full text is fetched when the dialog opens
+  const [fullPoem, setFullPoem] = useState(poem.content ? poem : null);
+
+  const loadFullPoem = async (open) => {
+    if (!open || fullPoem) return;
+    try {
+      const response = await axios.get(`${API}/poems/${poem.id}`);
+      setFullPoem(response.data);
+    } catch (error) {
+      console.error('خطأ في تحميل القصيدة:', error);
+    }
+  };
 
   const explainWord = async (word, context) => {
     setLoadingWord(word);
@@ -337,7 +349,7 @@ const PoemDialog = ({ poem, children }) => {
   };
 
   return (
-    <Dialog>
+    <Dialog onOpenChange={loadFullPoem}>
       <DialogTrigger asChild>
         {children}
       </DialogTrigger>
@@ -348,7 +360,7 @@ const PoemDialog = ({ poem, children }) => {
           </DialogTitle>
           <DialogDescription className="text-gray-600 dark:text-gray-300">
             بقلم: {poem.poet_name} • {poem.theme}
-            {poem.meter && ` • البحر: ${poem.meter}`}
+            {fullPoem?.meter && ` • البحر: ${fullPoem.meter}`}
           </DialogDescription>
         </DialogHeader>
         
@@ -357,7 +369,11 @@ const PoemDialog = ({ poem, children }) => {
           <div className="md:col-span-2">
             <div className="bg-amber-50 dark:bg-gray-700 rounded-lg p-6 border-2 border-amber-200 dark:border-gray-600">
               <div className="text-xl leading-loose font-amiri text-gray-800 dark:text-gray-200">
-                {renderPoetryWithClickableWords(poem.content)}
+                {fullPoem ? (
+                  renderPoetryWithClickableWords(fullPoem.content)
+                ) : (
+                  <Sparkles className="h-6 w-6 animate-spin mx-auto text-amber-600 dark:text-amber-400" />
+                )}
               </div>
               <p className="text-sm text-amber-600 dark:text-amber-400 mt-4 text-center italic">
                 اضغط على أي كلمة لمعرفة معناها